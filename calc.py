@@ -0,0 +1,372 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# 維持すべき純資産額の下限（会社計算規則第158条第6号）
+MIN_NET_ASSETS = 3000000
+
+# 計算結果として返す項目
+RESULT_KEYS = (
+    "surplus_amount",
+    "treasury_stock_adjustments",
+    "capital_reserve_adjustments",
+    "dividend_adjustments",
+    "treasury_stock_abs",
+    "additional_treasury_adjustments",
+    "interim_settlement_adjustments",
+    "goodwill_deferred_deduction",
+    "valuation_adjustments",
+    "net_assets_adjustment",
+    "distributable_amount",
+    "goodwill_pattern",
+    "contributions",
+)
+DistributableResult = namedtuple("DistributableResult", RESULT_KEYS)
+
+
+# 同じ入力での再計算を避けるため、位置引数のタプルをキーにメモ化する
+@lru_cache(maxsize=256)
+def _calculate_core(
+    capital_stock,
+    capital_reserve,
+    other_capital_surplus,
+    earned_reserve,
+    other_retained_earnings,
+    treasury_stock,
+    goodwill,
+    deferred_assets,
+    securities_valuation,
+    land_revaluation,
+    disposal_treasury_stock,
+    disposal_consideration,
+    canceled_treasury_stock,
+    capital_reduction,
+    reserve_reduction,
+    surplus_to_capital,
+    dividend_amount,
+    dividend_reserve,
+    interim_settlement,
+    interim_profit,
+    interim_loss,
+    interim_treasury_disposal,
+):
+    """計算の本体。各項目をDistributableResultとして返す"""
+    # 1. 剰余金の額の計算
+    surplus_amount = other_capital_surplus + other_retained_earnings
+
+    # 2. 剰余金の額の調整
+    treasury_stock_adjustments = (
+        disposal_consideration - disposal_treasury_stock - canceled_treasury_stock
+    )
+    capital_reserve_adjustments = (
+        capital_reduction + reserve_reduction - surplus_to_capital
+    )
+    dividend_adjustments = -(dividend_amount + dividend_reserve)
+
+    # 3. 自己株式についての調整
+    treasury_stock_abs = abs(treasury_stock) - disposal_treasury_stock
+    additional_treasury_adjustments = -disposal_consideration
+
+    # 4. 臨時決算に伴う調整
+    interim_settlement_adjustments = 0
+    if interim_settlement:
+        interim_settlement_adjustments = (
+            interim_profit - interim_loss + interim_treasury_disposal
+        )
+
+    # 5. のれん等調整額の計算
+    goodwill_adjustment = goodwill // 2
+    deferred_asset_adjustment = deferred_assets
+    goodwill_deferred_adjustment = goodwill_adjustment + deferred_asset_adjustment
+
+    # 資本金と準備金の合計
+    capital_reserve_total = capital_stock + capital_reserve + earned_reserve
+
+    # のれん等調整額の分配可能額からの控除額計算
+    capital_reserve_surplus_total = capital_reserve_total + other_capital_surplus
+    goodwill_overflow = goodwill_adjustment > capital_reserve_surplus_total
+    if goodwill_overflow:
+        # のれんの半額だけで資本金・準備金とその他資本剰余金の合計を超える場合
+        goodwill_pattern = 4
+        goodwill_deferred_deduction = other_capital_surplus + deferred_asset_adjustment
+    else:
+        # 資本金・準備金の合計を超える部分のみを控除
+        goodwill_pattern = (
+            1
+            if goodwill_deferred_adjustment <= capital_reserve_total
+            else (
+                2
+                if goodwill_deferred_adjustment <= capital_reserve_surplus_total
+                else 3
+            )
+        )
+        goodwill_deferred_deduction = max(
+            0, goodwill_deferred_adjustment - capital_reserve_total
+        )
+
+    # 6. 評価換算差額等の調整
+    valuation_adjustments = min(securities_valuation, 0) + min(land_revaluation, 0)
+
+    # 7. 純資産額300万円維持のための調整
+    net_assets = (
+        capital_stock
+        + capital_reserve
+        + earned_reserve
+        + other_capital_surplus
+        + other_retained_earnings
+        + treasury_stock
+    )
+    net_assets_adjustment = max(MIN_NET_ASSETS - net_assets, 0)
+
+    # 8. 分配可能額の計算
+    contributions = (
+        surplus_amount,
+        treasury_stock_adjustments,
+        capital_reserve_adjustments,
+        dividend_adjustments,
+        -treasury_stock_abs,
+        additional_treasury_adjustments,
+        interim_settlement_adjustments,
+        -goodwill_deferred_deduction,
+        valuation_adjustments,
+        -net_assets_adjustment,
+    )
+    distributable_amount = sum(contributions)
+
+    return DistributableResult(
+        surplus_amount,
+        treasury_stock_adjustments,
+        capital_reserve_adjustments,
+        dividend_adjustments,
+        treasury_stock_abs,
+        additional_treasury_adjustments,
+        interim_settlement_adjustments,
+        goodwill_deferred_deduction,
+        valuation_adjustments,
+        net_assets_adjustment,
+        distributable_amount,
+        goodwill_pattern,
+        contributions,
+    )
+
+
+def calculate_distributable_amount(
+    # 会社の基本情報
+    capital_stock=0,
+    capital_reserve=0,
+    other_capital_surplus=0,
+    earned_reserve=0,
+    other_retained_earnings=0,
+    treasury_stock=0,
+    # のれん・繰延資産
+    goodwill=0,
+    deferred_assets=0,
+    # 評価・換算差額等
+    securities_valuation=0,
+    land_revaluation=0,
+    # 自己株式の処分・消却
+    disposal_treasury_stock=0,
+    disposal_consideration=0,
+    canceled_treasury_stock=0,
+    # 資本金・準備金の増減
+    capital_reduction=0,
+    reserve_reduction=0,
+    surplus_to_capital=0,
+    # 剰余金の配当
+    dividend_amount=0,
+    dividend_reserve=0,
+    # 臨時決算の情報
+    interim_settlement=False,
+    interim_profit=0,
+    interim_loss=0,
+    interim_treasury_disposal=0,
+):
+    """分配可能額と計算過程の各調整額を計算する"""
+    # 臨時決算がない場合は臨時決算の入力値を使わないため、0に揃えてキャッシュを共有する
+    if not interim_settlement:
+        interim_settlement = False
+        interim_profit = interim_loss = interim_treasury_disposal = 0
+    return _calculate_core(
+        capital_stock,
+        capital_reserve,
+        other_capital_surplus,
+        earned_reserve,
+        other_retained_earnings,
+        treasury_stock,
+        goodwill,
+        deferred_assets,
+        securities_valuation,
+        land_revaluation,
+        disposal_treasury_stock,
+        disposal_consideration,
+        canceled_treasury_stock,
+        capital_reduction,
+        reserve_reduction,
+        surplus_to_capital,
+        dividend_amount,
+        dividend_reserve,
+        interim_settlement,
+        interim_profit,
+        interim_loss,
+        interim_treasury_disposal,
+    )
+
+
+def calculate_distributable_amount_batch(
+    # 会社の基本情報
+    capital_stock=0,
+    capital_reserve=0,
+    other_capital_surplus=0,
+    earned_reserve=0,
+    other_retained_earnings=0,
+    treasury_stock=0,
+    # のれん・繰延資産
+    goodwill=0,
+    deferred_assets=0,
+    # 評価・換算差額等
+    securities_valuation=0,
+    land_revaluation=0,
+    # 自己株式の処分・消却
+    disposal_treasury_stock=0,
+    disposal_consideration=0,
+    canceled_treasury_stock=0,
+    # 資本金・準備金の増減
+    capital_reduction=0,
+    reserve_reduction=0,
+    surplus_to_capital=0,
+    # 剰余金の配当
+    dividend_amount=0,
+    dividend_reserve=0,
+    # 臨時決算の情報
+    interim_settlement=False,
+    interim_profit=0,
+    interim_loss=0,
+    interim_treasury_disposal=0,
+):
+    """複数シナリオの分配可能額をまとめて計算する
+
+    各引数には1次元配列かスカラーを渡す（スカラーは全シナリオ共通の値として扱う）。
+    戻り値はcalculate_distributable_amountと同じキーを持ち、値はシナリオごとの配列。
+    """
+    capital_stock = np.asarray(capital_stock, dtype=np.int64)
+    capital_reserve = np.asarray(capital_reserve, dtype=np.int64)
+    other_capital_surplus = np.asarray(other_capital_surplus, dtype=np.int64)
+    earned_reserve = np.asarray(earned_reserve, dtype=np.int64)
+    other_retained_earnings = np.asarray(other_retained_earnings, dtype=np.int64)
+    treasury_stock = np.asarray(treasury_stock, dtype=np.int64)
+    goodwill = np.asarray(goodwill, dtype=np.int64)
+    deferred_assets = np.asarray(deferred_assets, dtype=np.int64)
+    securities_valuation = np.asarray(securities_valuation, dtype=np.int64)
+    land_revaluation = np.asarray(land_revaluation, dtype=np.int64)
+    disposal_treasury_stock = np.asarray(disposal_treasury_stock, dtype=np.int64)
+    disposal_consideration = np.asarray(disposal_consideration, dtype=np.int64)
+    canceled_treasury_stock = np.asarray(canceled_treasury_stock, dtype=np.int64)
+    capital_reduction = np.asarray(capital_reduction, dtype=np.int64)
+    reserve_reduction = np.asarray(reserve_reduction, dtype=np.int64)
+    surplus_to_capital = np.asarray(surplus_to_capital, dtype=np.int64)
+    dividend_amount = np.asarray(dividend_amount, dtype=np.int64)
+    dividend_reserve = np.asarray(dividend_reserve, dtype=np.int64)
+    interim_settlement = np.asarray(interim_settlement, dtype=bool)
+    interim_profit = np.asarray(interim_profit, dtype=np.int64)
+    interim_loss = np.asarray(interim_loss, dtype=np.int64)
+    interim_treasury_disposal = np.asarray(interim_treasury_disposal, dtype=np.int64)
+
+    # 1. 剰余金の額の計算
+    surplus_amount = other_capital_surplus + other_retained_earnings
+
+    # 2. 剰余金の額の調整
+    treasury_stock_adjustments = (
+        disposal_consideration - disposal_treasury_stock - canceled_treasury_stock
+    )
+    capital_reserve_adjustments = (
+        capital_reduction + reserve_reduction - surplus_to_capital
+    )
+    dividend_adjustments = -(dividend_amount + dividend_reserve)
+
+    # 3. 自己株式についての調整
+    treasury_stock_abs = np.abs(treasury_stock) - disposal_treasury_stock
+    additional_treasury_adjustments = -disposal_consideration
+
+    # 4. 臨時決算に伴う調整
+    interim_settlement_adjustments = np.where(
+        interim_settlement,
+        interim_profit - interim_loss + interim_treasury_disposal,
+        0,
+    )
+
+    # 5. のれん等調整額の計算
+    goodwill_adjustment = goodwill // 2
+    goodwill_deferred_adjustment = goodwill_adjustment + deferred_assets
+
+    # 資本金と準備金の合計
+    capital_reserve_total = capital_stock + capital_reserve + earned_reserve
+
+    # のれん等調整額の分配可能額からの控除額計算
+    capital_reserve_surplus_total = capital_reserve_total + other_capital_surplus
+    goodwill_conditions = [
+        goodwill_deferred_adjustment <= capital_reserve_total,
+        goodwill_deferred_adjustment <= capital_reserve_surplus_total,
+        goodwill_adjustment <= capital_reserve_surplus_total,
+    ]
+    goodwill_pattern = np.select(goodwill_conditions, [1, 2, 3], default=4)
+    goodwill_deferred_deduction = np.select(
+        goodwill_conditions,
+        [
+            0,
+            goodwill_deferred_adjustment - capital_reserve_total,
+            goodwill_deferred_adjustment - capital_reserve_total,
+        ],
+        default=other_capital_surplus + deferred_assets,
+    )
+
+    # 6. 評価換算差額等の調整
+    valuation_adjustments = np.minimum(securities_valuation, 0) + np.minimum(
+        land_revaluation, 0
+    )
+
+    # 7. 純資産額300万円維持のための調整
+    net_assets = (
+        capital_stock
+        + capital_reserve
+        + earned_reserve
+        + other_capital_surplus
+        + other_retained_earnings
+        + treasury_stock
+    )
+    net_assets_adjustment = np.maximum(MIN_NET_ASSETS - net_assets, 0)
+
+    # 8. 分配可能額の計算
+    contributions = np.stack(
+        np.broadcast_arrays(
+            surplus_amount,
+            treasury_stock_adjustments,
+            capital_reserve_adjustments,
+            dividend_adjustments,
+            -treasury_stock_abs,
+            additional_treasury_adjustments,
+            interim_settlement_adjustments,
+            -goodwill_deferred_deduction,
+            valuation_adjustments,
+            -net_assets_adjustment,
+        ),
+        axis=-1,
+    )
+    distributable_amount = contributions.sum(axis=-1)
+
+    # スカラーのまま計算された項目もシナリオ数の配列に揃える
+    values = np.broadcast_arrays(
+        surplus_amount,
+        treasury_stock_adjustments,
+        capital_reserve_adjustments,
+        dividend_adjustments,
+        treasury_stock_abs,
+        additional_treasury_adjustments,
+        interim_settlement_adjustments,
+        goodwill_deferred_deduction,
+        valuation_adjustments,
+        net_assets_adjustment,
+        distributable_amount,
+        goodwill_pattern,
+    )
+    return DistributableResult(*values, contributions)